@@ -1,8 +1,20 @@
-import collections
-import inspect
 import logging
+import os
 import statistics
 
+import numpy as np
+
+# Numba compiled statistics only pay off when check() is called many times
+# on short data in one process: importing Numba and loading the compiled
+# function costs far more than a few NumPy calls, and for long data NumPy
+# is faster. So they are only used when explicitly enabled.
+check_jit = None
+if os.getenv("OPL_CHECK_JIT", "0") == "1":
+    try:
+        import opl.investigator.check_jit as check_jit
+    except ImportError:
+        logging.warning("OPL_CHECK_JIT=1 but Numba is not installed")
+
 
 def _count_deviation(value, lower_boundary, upper_boundary):
     if lower_boundary <= value <= upper_boundary:
@@ -13,26 +25,112 @@ def _count_deviation(value, lower_boundary, upper_boundary):
             frac = dist / abs(upper_boundary - lower_boundary)
         except ZeroDivisionError:
             frac = 1
-        logging.debug(
-            f"_count_deviation({value}, {lower_boundary}, {upper_boundary}): dist={dist} frac={frac}"
-        )
+        if logging.root.isEnabledFor(logging.DEBUG):
+            logging.debug(
+                f"_count_deviation({value}, {lower_boundary}, {upper_boundary}): dist={dist} frac={frac}"
+            )
         return frac
 
 
-def _calculate_lower_upper_boundary(data, mean, comparator):
-    """Returns the calculated lower and upper boundary of the data
+def _format_value(value):
+    """Returns value for logging, only number of values for numpy array of
+    values checked by `check_batch()`"""
+    if isinstance(value, np.ndarray):
+        return f"<{len(value)} values>"
+    return value
+
+
+def _summarize(data):
+    """Returns mean, sample standard deviation, min and max of the data
+
+    Uses single pass compiled implementation if enabled (OPL_CHECK_JIT=1).
+    Otherwise mean is computed only once and reused for the deviations
+    (`ndarray.std()` would compute it again).
+
+    Args:
+        data: numpy array with at least two data points
+
+    Returns:
+        tuple with mean, stdev, min and max
+    """
+    if len(data) < 2:
+        raise ValueError("Summary requires at least two data points")
+    if check_jit is not None:
+        return check_jit.summarize(data)
+    mean = data.mean()
+    deviations = data - mean
+    stdev = np.sqrt(np.dot(deviations, deviations) / (len(data) - 1))
+    return mean, stdev, data.min(), data.max()
+
+
+def _compute_stats(data):
+    """Computes statistics of the data shared by all the check methods
+
+    Args:
+        data: collected history data
+
+    Returns:
+        dict with data length, mean, stdev (None if there are less than
+        two data points), min and max
+    """
+    data = np.asarray(data, dtype=np.float64)
+    # Do not format (possibly long) data when it would not be logged anyway
+    if logging.root.isEnabledFor(logging.DEBUG):
+        logging.debug(f"data={data}")
+    if len(data) == 0:
+        raise statistics.StatisticsError("mean requires at least one data point")
+    if len(data) > 1:
+        mean, stdev, data_min, data_max = _summarize(data)
+        stdev = float(stdev)
+    else:
+        # Stdev needs at least two data points, stdev checks will fail
+        mean, stdev, data_min, data_max = data.mean(), None, data.min(), data.max()
+    return {
+        "n": len(data),
+        "mean": float(mean),
+        "stdev": stdev,
+        "min": float(data_min),
+        "max": float(data_max),
+    }
+
+
+def _compute_quantiles(data):
+    """Returns quartiles of the data
+
+    Only needed by IQR check, so not part of `_compute_stats()`. NumPy
+    finds them with a partial sort (introselect) in linear time.
 
     Args:
         data: collected history data
-        mean: mean of the collected history data
+
+    Returns:
+        list with 1st, 2nd and 3rd quartile
+    """
+    data = np.asarray(data, dtype=np.float64)
+    if len(data) < 2:
+        raise statistics.StatisticsError("must have at least two data points")
+    if len(data) == 2:
+        # statistics.quantiles() extrapolates beyond the data here while
+        # NumPy clamps quantiles to the data range
+        return statistics.quantiles(data.tolist())
+    # For 3 and more data points "weibull" gives same results as
+    # statistics.quantiles() with its default "exclusive" method
+    return np.quantile(data, [0.25, 0.5, 0.75], method="weibull").tolist()
+
+
+def _calculate_lower_upper_boundary(stats, comparator):
+    """Returns the calculated lower and upper boundary of the data
+
+    Args:
+        stats: statistics of the collected history data
         comparator: defines the type of comparison to be done
 
     Returns:
         tuple with lower and upper boundary
     """
-    assert isinstance(data, list), "Data provided have to be a list"
-    lower_boundary = float(mean - (mean - min(data)))
-    upper_boundary = float(mean + (max(data) - mean))
+    mean = stats["mean"]
+    lower_boundary = float(mean - (mean - stats["min"]))
+    upper_boundary = float(mean + (stats["max"] - mean))
     if comparator == "lte_max":
         return (float("-inf"), upper_boundary)
     elif comparator == "gte_min":
@@ -41,7 +139,7 @@ def _calculate_lower_upper_boundary(data, mean, comparator):
         return (lower_boundary, upper_boundary)
 
 
-def _check_by_min_max(data, value, comparator):
+def _check_by_min_max(method_name, stats, value, comparator):
     """Checks the value range using lower and upper boundary.
     If the value is within given range it is a PASS else a FAIL
 
@@ -61,139 +159,226 @@ def _check_by_min_max(data, value, comparator):
         with collecting that data".
 
     Args:
-        data: collected history data
+        method_name: name of the check method to record in the info
+        stats: statistics of the collected history data
         value: value to be checked against
         comparator: defines the type of comparison to be done
 
     Returns:
         Boolean value
     """
-    logging.debug(f"data={data} and value={value}")
-    mean = statistics.mean(data)
-    lower_boundary, upper_boundary = _calculate_lower_upper_boundary(
-        data, mean, comparator
-    )
+    if logging.root.isEnabledFor(logging.DEBUG):
+        logging.debug(f"stats={stats} and value={value}")
+    mean = stats["mean"]
+    lower_boundary, upper_boundary = _calculate_lower_upper_boundary(stats, comparator)
     logging.info(
-        f"value={value}, data len={len(data)} mean={mean:.03f}, i.e. boundaries={lower_boundary:.03f}--{upper_boundary:.03f}"
+        f"value={_format_value(value)}, data len={stats['n']} mean={mean:.03f}, i.e. boundaries={lower_boundary:.03f}--{upper_boundary:.03f}"
     )
-    info = collections.OrderedDict(
-        [
-            ("method", inspect.stack()[1][3]),
-            ("value", value),
-            ("data len", len(data)),
-            ("data mean", mean),
-            ("data min", float(min(data))),
-            ("data max", float(max(data))),
-            ("lower_boundary", lower_boundary),
-            ("upper_boundary", upper_boundary),
-        ]
-    )
-    return lower_boundary <= value <= upper_boundary, info
-
-
-def _check_by_stdev(data, value, num_deviations):
-    logging.debug(f"data={data} and value={value}")
-    mean = statistics.mean(data)
-    stdev = statistics.stdev(data)
+    info = {
+        "method": method_name,
+        "value": value,
+        "data len": stats["n"],
+        "data mean": mean,
+        "data min": stats["min"],
+        "data max": stats["max"],
+        "lower_boundary": lower_boundary,
+        "upper_boundary": upper_boundary,
+    }
+    # Written this way so it also works for numpy array of values
+    return (lower_boundary <= value) & (value <= upper_boundary), info
+
+
+def _check_by_stdev(method_name, stats, value, num_deviations):
+    if logging.root.isEnabledFor(logging.DEBUG):
+        logging.debug(f"stats={stats} and value={value}")
+    mean = stats["mean"]
+    stdev = stats["stdev"]
+    if stdev is None:
+        raise statistics.StatisticsError("stdev requires at least two data points")
     acceptable_deviation = stdev * num_deviations
     lower_boundary = float(mean - acceptable_deviation)
     upper_boundary = float(mean + acceptable_deviation)
     logging.info(
-        f"value={value}, data len={len(data)} mean={mean:.03f}, stdev={stdev:.03f}, boundaries={lower_boundary:.03f}--{upper_boundary:.03f}"
-    )
-    info = collections.OrderedDict(
-        [
-            ("method", inspect.stack()[1][3]),
-            ("value", value),
-            ("data len", len(data)),
-            ("data mean", mean),
-            ("data stdev", stdev),
-            ("data min", float(min(data))),
-            ("data max", float(max(data))),
-            ("lower_boundary", lower_boundary),
-            ("upper_boundary", upper_boundary),
-        ]
+        f"value={_format_value(value)}, data len={stats['n']} mean={mean:.03f}, stdev={stdev:.03f}, boundaries={lower_boundary:.03f}--{upper_boundary:.03f}"
     )
-    return lower_boundary <= value <= upper_boundary, info
-
-
-def check_by_iqr(data, value):
-    """Checks if the current value is within the interquartile range of the previous values"""
-    logging.debug(f"data={data} and value={value}")
-    mean = statistics.mean(data)
-    quantiles = statistics.quantiles(data)
+    info = {
+        "method": method_name,
+        "value": value,
+        "data len": stats["n"],
+        "data mean": mean,
+        "data stdev": stdev,
+        "data min": stats["min"],
+        "data max": stats["max"],
+        "lower_boundary": lower_boundary,
+        "upper_boundary": upper_boundary,
+    }
+    # Written this way so it also works for numpy array of values
+    return (lower_boundary <= value) & (value <= upper_boundary), info
+
+
+def _check_by_iqr(method_name, stats, value):
+    if logging.root.isEnabledFor(logging.DEBUG):
+        logging.debug(f"stats={stats} and value={value}")
+    mean = stats["mean"]
+    quantiles = stats["q"]
     lower_boundary = float(quantiles[0])
     upper_boundary = float(quantiles[2])
     logging.info(
-        f"value={value}, data len={len(data)} mean={mean:.03f}, boundaries={lower_boundary:.03f}--{upper_boundary:.03f}"
-    )
-    info = collections.OrderedDict(
-        [
-            ("method", inspect.stack()[0][3]),
-            ("value", value),
-            ("data len", len(data)),
-            ("data mean", mean),
-            ("data quantiles", quantiles),
-            ("data min", float(min(data))),
-            ("data max", float(max(data))),
-            ("lower_boundary", lower_boundary),
-            ("upper_boundary", upper_boundary),
-        ]
+        f"value={_format_value(value)}, data len={stats['n']} mean={mean:.03f}, boundaries={lower_boundary:.03f}--{upper_boundary:.03f}"
     )
-    return lower_boundary <= value <= upper_boundary, info
+    info = {
+        "method": method_name,
+        "value": value,
+        "data len": stats["n"],
+        "data mean": mean,
+        "data quantiles": quantiles,
+        "data min": stats["min"],
+        "data max": stats["max"],
+        "lower_boundary": lower_boundary,
+        "upper_boundary": upper_boundary,
+    }
+    # Written this way so it also works for numpy array of values
+    return (lower_boundary <= value) & (value <= upper_boundary), info
+
+
+def check_by_iqr(data, value, stats=None):
+    """Checks if the current value is within the interquartile range of the previous values"""
+    if stats is None:
+        stats = _compute_stats(data)
+    if "q" not in stats:
+        assert data is not None, "Data are needed to compute quantiles"
+        stats["q"] = _compute_quantiles(data)
+    return _check_by_iqr("check_by_iqr", stats, value)
 
 
-def check_by_min_max_0_1(data, value):
+def check_by_min_max_0_1(data, value, stats=None):
     """Checks if the current value is within the min/max range of previous values"""
-    return _check_by_min_max(data, value, None)
+    if stats is None:
+        stats = _compute_stats(data)
+    return _check_by_min_max("check_by_min_max_0_1", stats, value, None)
 
 
-def check_by_lte_max(data, value):
+def check_by_lte_max(data, value, stats=None):
     """Checks if the current value is less than max range of previous values"""
-    return _check_by_min_max(data, value, "lte_max")
+    if stats is None:
+        stats = _compute_stats(data)
+    return _check_by_min_max("check_by_lte_max", stats, value, "lte_max")
 
 
-def check_by_gte_min(data, value):
+def check_by_gte_min(data, value, stats=None):
     """Checks if the current value is more than min range of previous values"""
-    return _check_by_min_max(data, value, "gte_min")
+    if stats is None:
+        stats = _compute_stats(data)
+    return _check_by_min_max("check_by_gte_min", stats, value, "gte_min")
 
 
-def check_by_stdev_1(data, value):
+def check_by_stdev_1(data, value, stats=None):
     """Checks if the current value is within 1 standard deviations of the mean of previous values"""
-    return _check_by_stdev(data, value, 1)
+    if stats is None:
+        stats = _compute_stats(data)
+    return _check_by_stdev("check_by_stdev_1", stats, value, 1)
 
 
-def check_by_stdev_2(data, value):
+def check_by_stdev_2(data, value, stats=None):
     """Checks if the current value is within 2 standard deviations of the mean of previous values"""
-    return _check_by_stdev(data, value, 2)
+    if stats is None:
+        stats = _compute_stats(data)
+    return _check_by_stdev("check_by_stdev_2", stats, value, 2)
 
 
-def check_by_stdev_3(data, value):
+def check_by_stdev_3(data, value, stats=None):
     """Checks if the current value is within 2 standard deviations of the mean of previous values"""
-    return _check_by_stdev(data, value, 3)
+    if stats is None:
+        stats = _compute_stats(data)
+    return _check_by_stdev("check_by_stdev_3", stats, value, 3)
 
 
-def check(methods, data, value, description="N/A", verbose=True):
-    assert value is not None, "Value to check should not be None"
+_METHODS = {
+    "check_by_iqr": check_by_iqr,
+    "check_by_min_max_0_1": check_by_min_max_0_1,
+    "check_by_lte_max": check_by_lte_max,
+    "check_by_gte_min": check_by_gte_min,
+    "check_by_stdev_1": check_by_stdev_1,
+    "check_by_stdev_2": check_by_stdev_2,
+    "check_by_stdev_3": check_by_stdev_3,
+}
+
+_DEFAULT_METHODS = ("check_by_min_max_0_1",)
+
 
+def _resolve_methods(methods):
+    """Returns list of (name, function) tuples for given check method names"""
     if methods == []:
-        methods = ["check_by_min_max_0_1"]
+        methods = _DEFAULT_METHODS
+    resolved = []
     for method in methods:
-        assert method in globals(), f"Check method '{method}' not defined"
+        func = _METHODS.get(method)
+        assert func is not None, f"Check method '{method}' not defined"
+        resolved.append((method, func))
+    return resolved
+
+
+def check(
+    methods, data, value, description="N/A", verbose=True, compute_deviation=True
+):
+    assert value is not None, "Value to check should not be None"
+
+    methods = _resolve_methods(methods)
+
+    data = np.asarray(data, dtype=np.float64)
+    stats = _compute_stats(data)
 
     results = []
     info_all = []
-    for method in methods:
-        result, info = globals()[method](data, value)
+    for method, func in methods:
+        result, info = func(data, value, stats=stats)
         results.append(result)
         logging.info(f"{method} value {value} returned {'PASS' if result else 'FAIL'}")
 
-        info_full = collections.OrderedDict()
-        info_full["description"] = description
-        info_full["result"] = "PASS" if result else "FAIL"
-        info_full.update(info)
-        info_full["deviation"] = _count_deviation(
-            value, info["lower_boundary"], info["upper_boundary"]
+        if compute_deviation:
+            deviation = _count_deviation(
+                value, info["lower_boundary"], info["upper_boundary"]
+            )
+        else:
+            deviation = None
+        info_all.append(
+            {
+                "description": description,
+                "result": "PASS" if result else "FAIL",
+                **info,
+                "deviation": deviation,
+            }
         )
-        info_all.append(info_full)
+    return results, info_all
+
+
+def check_batch(methods, data, values):
+    """Checks multiple values against same historical data at once
+
+    Statistics of the data and boundaries for every method are only
+    computed once and all the values are compared with them in one
+    vectorized comparison.
+
+    Args:
+        methods: list of check method names
+        data: collected history data
+        values: values to be checked
+
+    Returns:
+        tuple with boolean numpy array of shape (len(methods), len(values))
+        and list with info (without the value) for every method
+    """
+    methods = _resolve_methods(methods)
+
+    data = np.asarray(data, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    assert not np.isnan(values).any(), "Values to check should not be NaN"
+    stats = _compute_stats(data)
+
+    results = np.empty((len(methods), len(values)), dtype=bool)
+    info_all = []
+    for i, (_, func) in enumerate(methods):
+        results[i], info = func(data, values, stats=stats)
+        del info["value"]
+        info_all.append(info)
     return results, info_all
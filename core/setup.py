@@ -22,16 +22,22 @@ setuptools.setup(
         "Intended Audience :: Developers",
         "Topic :: Software Development :: Quality Assurance",
     ],
-    python_requires=">=3.6",
+    python_requires=">=3.8",
     install_requires=[
         "Jinja2>=3.0",
         "boto3",
         "junitparser",
+        "numpy>=1.22",
         "PyYAML",
         "requests",
         "tabulate",
         "deepdiff",
     ],
+    extras_require={
+        "jit": [
+            "numba",
+        ],
+    },
     package_data={
         "opl": [
             "status_data_report.txt",
@@ -1,5 +1,7 @@
 import logging
+import queue
 import random
+import threading
 import time
 
 
@@ -148,8 +150,9 @@ class BatchProcessor:
         if self.lock is not None:
             self.lock.acquire(True)
 
+        # Whole batch goes to the DB in a single INSERT statement
         psycopg2.extras.execute_values(
-            cursor, self.sql, self.data, template=None, page_size=100
+            cursor, self.sql, self.data, template=None, page_size=self.batch
         )
         self.db.commit()
         cursor.close()
@@ -173,6 +176,44 @@ class BatchProcessor:
             self.commit()
 
 
+class QueuedBatchProcessor:
+    """
+    Wrapper around BatchProcessor with same `add()` and `commit()` interface,
+    but `add()` only puts the row into a queue and rows are passed to
+    the BatchProcessor (and so committed to DB) by a dedicated thread.
+    Useful when rows are added from a thread which should not wait for DB,
+    e.g. from Kafka producer callbacks. If `convert` function is provided,
+    it is used (in the dedicated thread) to transform every row before it
+    is stored.
+    """
+
+    def __init__(self, processor, convert=None):
+        self.processor = processor
+        self.convert = convert
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._work, daemon=True)
+        self.thread.start()
+
+    def _work(self):
+        while True:
+            row = self.queue.get()
+            try:
+                if self.convert is not None:
+                    row = self.convert(row)
+                self.processor.add(row)
+            except Exception as e:
+                logging.error(f"Failed to store row {row}", exc_info=e)
+            finally:
+                self.queue.task_done()
+
+    def commit(self):
+        self.queue.join()
+        self.processor.commit()
+
+    def add(self, row):
+        self.queue.put_nowait(row)
+
+
 def BatchReader(db, sql, limit=100):  # noqa: N802
     """
     Creates named server side cursor (so not all results are fetched to
@@ -13,6 +13,26 @@ import os
 import opl.gen
 import opl.date
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data):
+    """Parse JSON string, using faster orjson if it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(message):
+    """Dump python struct into json string encoded into bytes (ready to be
+    produced to Kafka), using faster orjson if it is installed."""
+    if orjson is not None:
+        return orjson.dumps(message)
+    return json.dumps(message).encode("UTF-8")
+
 
 class GenericGenerator:
     """Iterator that creates payloads with messages formatted using given template."""
@@ -54,7 +74,7 @@ class GenericGenerator:
         if self.dump_message:
             msg = self.template.render(**data).encode("UTF-8")
         else:
-            msg = json.loads(self.template.render(**data))
+            msg = loads(self.template.render(**data))
         return mid, msg
 
     def _mid(self, data):
@@ -78,7 +98,7 @@ class GenericGenerator:
     def dump(self, message):
         """Helper to dump python struct into json string and encode it
         into bytes so it is ready to be produced to Kafka."""
-        return json.dumps(message).encode("UTF-8")
+        return dumps(message)
 
     def _get_uuid(self):
         return opl.gen.gen_uuid()
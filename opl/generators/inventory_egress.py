@@ -1,4 +1,3 @@
-import json
 import os.path
 import random
 
@@ -32,14 +31,23 @@ class EgressHostsGenerator(opl.generators.generic.GenericGenerator):
         self.s3_presigned_url = s3_presigned_url
         self.per_account_data = per_account_data
 
+        # Accounts are picked from per_account_data for every message, so
+        # prepare lookups for them. Identity is only created once per account.
+        self.per_account_accounts = [i["account"] for i in self.per_account_data]
+        self.per_account_os_tree_commits = {}
+        for i in self.per_account_data:
+            self.per_account_os_tree_commits.setdefault(
+                i["account"], i["os_tree_commits"]
+            )
+        self.per_account_b64_identities = {}
+
         # Load package profile generator
         self.pg = opl.generators.packages.PackagesGenerator(self.package_file)
 
         # Load data file
         data_dirname = os.path.dirname(__file__)
         data_file = os.path.join(data_dirname, self.egress_data_file)
-        with open(data_file, "r") as fp:
-            self.data = json.load(fp)
+        self.data = opl.generators.packages.load_data_file(data_file)
 
         # Check parameters sanity
         assert (
@@ -55,15 +63,15 @@ class EgressHostsGenerator(opl.generators.generic.GenericGenerator):
             os_tree_commit = (
                 "ec3c003da4eafaa971b528b3383d8caff688a110e53af71a85e666cf60b4ed20"
             )
+            b64_identity = self._get_b64_identity(account, account)
         else:
-            account = random.choice([i["account"] for i in self.per_account_data])
-            os_tree_commit = random.choice(
-                [
-                    i["os_tree_commits"]
-                    for i in self.per_account_data
-                    if i["account"] == account
-                ][0]
-            )
+            account = random.choice(self.per_account_accounts)
+            os_tree_commit = random.choice(self.per_account_os_tree_commits[account])
+            if account not in self.per_account_b64_identities:
+                self.per_account_b64_identities[account] = self._get_b64_identity(
+                    account, account
+                )
+            b64_identity = self.per_account_b64_identities[account]
         return {
             "inventory_id": self._get_uuid(),
             "insights_id": self._get_uuid(),
@@ -72,9 +80,12 @@ class EgressHostsGenerator(opl.generators.generic.GenericGenerator):
             "os_tree_commit": os_tree_commit,
             "fqdn": self._get_hostname(),
             "installed_packages": self.pg.generate(self.n_packages),
+            # random.sample() only does O(10) work here (it tracks picked
+            # indexes in a set for big populations) and is faster than
+            # numpy.random.Generator.choice(..., replace=False)
             "yum_repos": self.data["ENABLED_REPOS"]
             + random.sample(self.data["AVAILABLE_REPOS"], 10),  # noqa: W503
-            "b64_identity": self._get_b64_identity(account, account),
+            "b64_identity": b64_identity,
             "msg_type": self.msg_type,
             "machine_id": self._get_rhel_machine_id(),
             "subscription_manager_id": self._get_uuid(),
@@ -1,19 +1,30 @@
 # Generates a "random" service/package/whatever
 # implemented as picking random item from corresponding .json/.txt file and returning it
 
+import functools
 import os.path
 import json
 import random
 
 
+@functools.lru_cache(maxsize=None)
+def load_data_file(data_file):
+    """
+    Load and parse JSON data file. Result is cached, so generators created
+    e.g. in every producer thread do not parse same big file again. Do not
+    modify returned data.
+    """
+    with open(data_file, "r") as fp:
+        return json.load(fp)
+
+
 class PackagesGenerator:
     def __init__(self, package_file_name="packages_data.json"):
         data_dirname = os.path.dirname(__file__)
         self.data_file = os.path.join(data_dirname, package_file_name)
 
         # Load data
-        with open(self.data_file, "r") as fp:
-            data_raw = json.load(fp)
+        data_raw = load_data_file(self.data_file)
 
         # Only pick one version and drop rest of them to make
         # `generate()` faster
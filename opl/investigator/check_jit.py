@@ -0,0 +1,45 @@
+"""
+Numba compiled helpers for `opl.investigator.check`.
+
+Only used by `check` when enabled with OPL_CHECK_JIT=1 environment
+variable. Importing this module fails with ImportError when Numba is not
+installed (install with `python -m pip install .[jit]`), in which case
+`check` falls back to plain NumPy.
+"""
+
+import math
+
+import numba
+
+
+@numba.njit(cache=True)
+def summarize(data):
+    """Returns mean, sample standard deviation, min and max of the data
+
+    All of these are computed in one pass over the data, mean and variance
+    using numerically stable Welford's algorithm.
+
+    Args:
+        data: 1D numpy array with at least two data points
+
+    Returns:
+        tuple with mean, stdev, min and max
+    """
+    if data.shape[0] < 2:
+        raise ValueError("Summary requires at least two data points")
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    data_min = data[0]
+    data_max = data[0]
+    for x in data:
+        count += 1
+        delta = x - mean
+        mean += delta / count
+        m2 += delta * (x - mean)
+        if x < data_min:
+            data_min = x
+        if x > data_max:
+            data_max = x
+    stdev = math.sqrt(m2 / (count - 1))
+    return mean, stdev, data_min, data_max
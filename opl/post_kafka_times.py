@@ -1,9 +1,11 @@
 import argparse
+import collections
 import concurrent.futures
 import datetime
 import json
 import logging
 import os
+import queue
 import threading
 import time
 
@@ -28,9 +30,9 @@ You want to use this helper if you want to achieve this:
 
 To create a script using this helper, you can create this:
 
-    import json
     import socket
 
+    import opl.generators.generic
     import opl.generators.inventory_egress
     import opl.post_kafka_times
 
@@ -75,33 +77,45 @@ To create a script using this helper, you can create this:
         # This function is supposed to return payload usable by Kafka
         # producer when sending - i.e. simple `string`. Helper will just
         # encode it into `bytes`. If your producer returns strings, you
-        # might go with just `return message`.
+        # might go with just `return message`. You can also return
+        # `bytes` directly to skip the encoding step - e.g. helper
+        # `opl.generators.generic.dumps` does that and uses faster
+        # orjson if it is installed.
         # This function have access to arguments from argparse
         # and message_id and message as provided by generator.
-        return json.dumps(message)
+        return opl.generators.generic.dumps(message)
 
 
     def func_return_message_key(args, message_id, message):
         # This function is supposed to return message key. Just
-        # `return None` if your topic/app does not require it.
+        # `return None` if your topic/app does not require it. Same as
+        # with payload, you can return either `string` or `bytes`.
         return message_id
 
 
     def func_return_message_headers(args, message_id, message):
         # This function is supposed to return message headers if your
         # app/topic needs it. If you do not need it, just use `return []`.
-        _event_type = args.msg_type
         _request_id = message["platform_metadata"]["request_id"]
-        _producer = socket.gethostname()
         _insights_id = message["host"]["insights_id"]
         return [
-            ("event_type", _event_type),
             ("request_id", _request_id),
-            ("producer", _producer),
             ("insights_id", _insights_id),
         ]
 
 
+    def func_return_message_static_headers(args):
+        # This optional function is supposed to return message headers
+        # which are same for all the messages. These are only encoded
+        # once and added to headers from func_return_message_headers.
+        _event_type = args.msg_type
+        _producer = socket.gethostname()
+        return [
+            ("event_type", _event_type),
+            ("producer", _producer),
+        ]
+
+
     if __name__ == "__main__":
         # Here we just create config for the helper...
         config = {
@@ -110,6 +124,7 @@ To create a script using this helper, you can create this:
             "func_return_generator": func_return_generator,
             "func_return_message_payload": func_return_message_payload,
             "func_return_message_headers": func_return_message_headers,
+            "func_return_message_static_headers": func_return_message_static_headers,
             "func_return_message_key": func_return_message_key,
         }
         # ...and run the helper
@@ -140,81 +155,156 @@ class PostKafkaTimes:
         logging.info("Creating generator")
         self.generator = self.config["func_return_generator"](args)
 
-    def dt_now(self):
+    def prefetched(self, size=1024):
         """
-        Return current time in UTC timezone with UTC timezone.
+        Iterate over messages from generator. These are being generated in
+        a background thread (up to `size` messages in advance), so they are
+        ready when it is time to send them (e.g. after waiting for rate
+        limit).
         """
-        return datetime.datetime.utcnow().replace(tzinfo=datetime.timezone.utc)
+        messages = queue.Queue(maxsize=size)
+        stop = threading.Event()
+
+        def put(item):
+            # Give up when consumer is gone, so we do not block forever
+            while not stop.is_set():
+                try:
+                    messages.put(item, timeout=1)
+                except queue.Full:
+                    continue
+                return True
+            return False
+
+        def fill():
+            try:
+                for item in self.generator:
+                    if not put(item):
+                        return
+            except Exception as e:
+                put(e)
+            else:
+                put(None)
+
+        threading.Thread(target=fill, daemon=True).start()
+
+        try:
+            while True:
+                item = messages.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
 
     def work(self):
         """
         Produce messages generated by generator to Kafka using the producer.
         """
 
-        def handle_send_success(*args, **kwargs):
-            self.save_here.add((kwargs["message_id"], self.dt_now()))
+        # Messages waiting for Kafka to acknowledge them, as tuples
+        # (message_id, when it was sent, future returned by producer)
+        sent = collections.deque()
 
-        def handle_send_error(e, message_id):
-            logging.error(f"Failed to produce message {message_id}", exc_info=e)
+        def store_sent(done_only=True):
+            while sent and (sent[0][2].is_done or not done_only):
+                message_id, sent_at, future = sent.popleft()
+                if future.succeeded():
+                    self.save_here.add((message_id, sent_at))
+                else:
+                    logging.error(
+                        f"Failed to produce message {message_id}",
+                        exc_info=future.exception,
+                    )
 
-        def wait_for_next_second(second=int(time.perf_counter())):
-            while second == int(time.perf_counter()):
-                time.sleep(0.01)
-            return int(time.perf_counter())
+        # Headers same for all the messages only need to be encoded once
+        static_headers = []
+        if "func_return_message_static_headers" in self.config:
+            headers = self.config["func_return_message_static_headers"](self.args)
+            static_headers = [(h, k.encode("UTF-8")) for h, k in headers]
+
+        # Resolve config functions only once instead of for every message
+        func_return_message_id = self.config.get("func_return_message_id")
+        func_return_message_payload = self.config["func_return_message_payload"]
+        func_return_message_key = self.config["func_return_message_key"]
+        func_return_message_headers = self.config["func_return_message_headers"]
+        kafka_topic = self.args.kafka_topic
 
         logging.info("Started message generation")
 
         in_second = 0  # how many messages we have sent in this second
-        this_second = wait_for_next_second()  # second relevant for in_second
+        deadline = time.perf_counter() + 1.0  # when this second ends
 
-        for message_id, message in self.generator:
+        for message_id, message in self.prefetched():
             # If we have this function defined, allow custom message_id
-            if "func_return_message_id" in self.config:
-                message_id = self.config["func_return_message_id"](
-                    self.args, message_id, message
-                )
+            if func_return_message_id is not None:
+                message_id = func_return_message_id(self.args, message_id, message)
 
             # Message payload
-            value = self.config["func_return_message_payload"](
-                self.args, message_id, message
-            )
-            send_params = {"value": value.encode("UTF-8")}
+            value = func_return_message_payload(self.args, message_id, message)
+            if not isinstance(value, bytes):
+                value = value.encode("UTF-8")
+            send_params = {"value": value}
 
             # Do we need message key?
-            key = self.config["func_return_message_key"](self.args, message_id, message)
+            key = func_return_message_key(self.args, message_id, message)
             if key is not None:
-                send_params["key"] = key.encode("UTF-8")
+                if not isinstance(key, bytes):
+                    key = key.encode("UTF-8")
+                send_params["key"] = key
 
             # Do we need message headers?
-            headers = self.config["func_return_message_headers"](
-                self.args, message_id, message
-            )
-            send_params["headers"] = [(h, k.encode("UTF-8")) for h, k in headers]
+            headers = func_return_message_headers(self.args, message_id, message)
+            send_params["headers"] = static_headers + [
+                (h, k.encode("UTF-8")) for h, k in headers
+            ]
 
             # Show message if we wanted it
             if self.show_processed_messages:
                 print(f"Producing {json.dumps(send_params, sort_keys=True)}")
 
-            future = self.produce_here.send(self.args.kafka_topic, **send_params)
-            future.add_callback(handle_send_success, message_id=message_id)
-            future.add_errback(handle_send_error, message_id=message_id)
+            # Only take a timestamp here, it is converted to datetime
+            # when stored in DB (see `ns_to_datetime()`)
+            sent_at = time.time_ns()
+            future = self.produce_here.send(kafka_topic, **send_params)
+            sent.append((message_id, sent_at, future))
+            store_sent()
 
-            if int(time.perf_counter()) == this_second:
+            if self.rate != 0:
+                now = time.perf_counter()
+                if now >= deadline:
+                    logging.warning(
+                        f"In second ending at {deadline:.03f} sent {in_second} messages (but wanted to send {self.rate})"
+                    )
+                    deadline = now + 1.0
+                    in_second = 0
                 in_second += 1
                 if in_second == self.rate:
-                    logging.debug(f"In second {this_second} sent {in_second} messages")
-                    this_second = wait_for_next_second(this_second)
-                    in_second = 0
-            else:
-                if self.rate != 0 and self.rate != in_second:
-                    logging.warning(
-                        f"In second {this_second} sent {in_second} messages (but wanted to send {self.rate})"
+                    logging.debug(
+                        f"In second ending at {deadline:.03f} sent {in_second} messages"
                     )
-                    this_second = int(time.perf_counter())
+                    time.sleep(max(0, deadline - time.perf_counter()))
+                    deadline += 1.0
                     in_second = 0
 
         logging.info("Finished message generation, producing and storing")
 
+        self.produce_here.flush()
+        store_sent(done_only=False)
+
+
+def ns_to_datetime(row):
+    """
+    Convert (message_id, nanoseconds since epoch) row as recorded when
+    the message was sent to (message_id, datetime in UTC timezone).
+    """
+    message_id, ns = row
+    return (
+        message_id,
+        datetime.datetime.fromtimestamp(ns / 1e9, tz=datetime.timezone.utc),
+    )
+
 
 def post_kafka_times(config):
     """
@@ -292,8 +382,11 @@ def post_kafka_times(config):
         sql = queries_definition[config["query_store_info_produced"]]
         data_lock = threading.Lock()
         logging.info(f"Creating storage DB batch inserter with {sql}")
-        save_here = opl.db.BatchProcessor(
-            storage_db_connection, sql, batch=100, lock=data_lock
+        save_here = opl.db.QueuedBatchProcessor(
+            opl.db.BatchProcessor(
+                storage_db_connection, sql, batch=100, lock=data_lock
+            ),
+            convert=ns_to_datetime,
         )
 
         status_data.set_now("parameters.produce.started_at")
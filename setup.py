@@ -22,13 +22,14 @@ setuptools.setup(
         "Intended Audience :: Developers",
         "Topic :: Software Development :: Quality Assurance",
     ],
-    python_requires=">=3.6",
+    python_requires=">=3.8",
     install_requires=[
         "Jinja2>=3.0",
         "boto3",
         "junitparser",
         "kafka-python",
         "locust",
+        "numpy>=1.22",
         "psycopg2-binary",
         "PyYAML",
         "requests",
@@ -42,7 +43,13 @@ setuptools.setup(
             "black",
             "flake8",
             # Other development dependencies
-        ]
+        ],
+        "jit": [
+            "numba",
+        ],
+        "json": [
+            "orjson",
+        ],
     },
     package_data={
         "opl": [
@@ -11,6 +11,9 @@ import opl.generators.inventory_egress  # noqa: E402
 import opl.generators.packages  # noqa: E402
 import opl.status_data  # noqa: E402
 import opl.cluster_read  # noqa: E402
+import opl.investigator.check  # noqa: E402
+import opl.db  # noqa: E402
+import opl.post_kafka_times  # noqa: E402
 import opl.junit_cli  # noqa: E402
 import opl.retry  # noqa: E402
 import opl.args  # noqa: E402
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+import threading
+import unittest
+
+from .context import opl
+
+
+class FakeBatchProcessor:
+    def __init__(self):
+        self.data = []
+        self.committed = []
+        self.threads = set()
+
+    def add(self, row):
+        self.threads.add(threading.current_thread())
+        if row is None:
+            raise ValueError("Can not store None")
+        self.data.append(row)
+
+    def commit(self):
+        self.committed += self.data
+        self.data = []
+
+
+class TestQueuedBatchProcessor(unittest.TestCase):
+    def test_add_commit(self):
+        processor = FakeBatchProcessor()
+        queued = opl.db.QueuedBatchProcessor(processor)
+        for i in range(10):
+            queued.add((i, "abc"))
+        queued.add(None)
+        queued.commit()
+        self.assertEqual(processor.committed, [(i, "abc") for i in range(10)])
+        self.assertEqual(processor.threads, {queued.thread})
+
+    def test_convert(self):
+        processor = FakeBatchProcessor()
+        queued = opl.db.QueuedBatchProcessor(
+            processor, convert=lambda row: (row[0], row[1] * 2)
+        )
+        queued.add(("a", 1))
+        queued.commit()
+        self.assertEqual(processor.committed, [("a", 2)])
@@ -30,3 +30,20 @@ class TestPayloadGenerator(unittest.TestCase):
         pg = opl.generators.inventory_egress.EgressHostsGenerator()
         mid, msg = next(pg)
         self.assertIsInstance(msg, dict)
+
+    def test_per_account_data(self):
+        per_account_data = [
+            {"account": "1234567", "os_tree_commits": ["aaa", "bbb"]},
+            {"account": "7654321", "os_tree_commits": ["ccc"]},
+        ]
+        pg = opl.generators.inventory_egress.EgressHostsGenerator(
+            count=10, per_account_data=per_account_data
+        )
+        identities = {}
+        for mid, msg in pg:
+            account = msg["host"]["account"]
+            self.assertIn(account, ["1234567", "7654321"])
+            identities.setdefault(account, msg["platform_metadata"]["b64_identity"])
+            self.assertEqual(
+                identities[account], msg["platform_metadata"]["b64_identity"]
+            )
@@ -30,3 +30,12 @@ class TestPayloadGenerator(unittest.TestCase):
             )
             self.assertTrue(" " not in p)
             self.assertGreater(len(p), 9)  # minimum is 'a-1.noarch' I think
+
+    def test_data_file_loaded_once(self):
+        pg1 = opl.generators.packages.PackagesGenerator()
+        pg2 = opl.generators.packages.PackagesGenerator()
+        self.assertIs(
+            opl.generators.packages.load_data_file(pg1.data_file),
+            opl.generators.packages.load_data_file(pg2.data_file),
+        )
+        self.assertIsNot(pg1.data, pg2.data)
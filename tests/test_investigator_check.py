@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+import os
+import statistics
+import unittest
+import unittest.mock
+
+import numpy
+
+from .context import opl
+
+try:
+    import opl.investigator.check_jit as check_jit
+except ImportError:
+    check_jit = None
+
+
+class TestInvestigatorCheck(unittest.TestCase):
+    def setUp(self):
+        self.data = [100, 105, 95, 102, 98]
+
+    def test_check_by_min_max(self):
+        result, info = opl.investigator.check.check_by_min_max_0_1(self.data, 101)
+        self.assertTrue(result)
+        self.assertEqual(info["data min"], 95)
+        self.assertEqual(info["data max"], 105)
+        self.assertEqual(info["data mean"], 100)
+        result, _ = opl.investigator.check.check_by_min_max_0_1(self.data, 106)
+        self.assertFalse(result)
+        result, info = opl.investigator.check.check_by_lte_max(self.data, 0)
+        self.assertTrue(result)
+        self.assertEqual(info["method"], "check_by_lte_max")
+        result, _ = opl.investigator.check.check_by_gte_min(self.data, 1000)
+        self.assertTrue(result)
+
+    def test_check_by_stdev(self):
+        result, info = opl.investigator.check.check_by_stdev_1(self.data, 103)
+        self.assertTrue(result)
+        self.assertAlmostEqual(info["data stdev"], 3.807886552931954)
+        self.assertAlmostEqual(info["upper_boundary"], 103.807886552931954)
+        result, _ = opl.investigator.check.check_by_stdev_1(self.data, 104)
+        self.assertFalse(result)
+        result, _ = opl.investigator.check.check_by_stdev_2(self.data, 104)
+        self.assertTrue(result)
+
+    def test_check_by_iqr(self):
+        result, info = opl.investigator.check.check_by_iqr(self.data, 100)
+        self.assertTrue(result)
+        self.assertEqual(info["data quantiles"], [96.5, 100.0, 103.5])
+        self.assertEqual(info["lower_boundary"], 96.5)
+        self.assertEqual(info["upper_boundary"], 103.5)
+
+    def test_check(self):
+        results, info = opl.investigator.check.check(
+            ["check_by_min_max_0_1", "check_by_stdev_1", "check_by_iqr"],
+            self.data,
+            104,
+            description="some.metric",
+        )
+        self.assertEqual(results, [True, False, False])
+        self.assertEqual(len(info), 3)
+        self.assertEqual(info[0]["description"], "some.metric")
+        self.assertEqual(info[0]["result"], "PASS")
+        self.assertEqual(info[0]["method"], "check_by_min_max_0_1")
+        self.assertIsNone(info[0]["deviation"])
+        self.assertEqual(info[1]["result"], "FAIL")
+        self.assertEqual(info[1]["method"], "check_by_stdev_1")
+        self.assertEqual(info[2]["method"], "check_by_iqr")
+        self.assertAlmostEqual(info[2]["deviation"], 0.5 / 7)
+
+    def test_check_default_method(self):
+        results, info = opl.investigator.check.check([], self.data, 100)
+        self.assertEqual(results, [True])
+        self.assertEqual(info[0]["method"], "check_by_min_max_0_1")
+
+    def test_check_with_stats(self):
+        stats = opl.investigator.check._compute_stats(self.data)
+        self.assertEqual(stats["n"], 5)
+        self.assertEqual(stats["min"], 95)
+        self.assertEqual(stats["max"], 105)
+        self.assertNotIn("q", stats)
+        result, info = opl.investigator.check.check_by_stdev_2(None, 104, stats=stats)
+        self.assertTrue(result)
+        self.assertEqual(info["data len"], 5)
+
+    def test_check_quantiles_reused(self):
+        stats = opl.investigator.check._compute_stats(self.data)
+        opl.investigator.check.check_by_iqr(self.data, 100, stats=stats)
+        self.assertEqual(stats["q"], [96.5, 100.0, 103.5])
+        result, info = opl.investigator.check.check_by_iqr(None, 104, stats=stats)
+        self.assertFalse(result)
+        self.assertEqual(info["data quantiles"], [96.5, 100.0, 103.5])
+
+    def test_check_quantiles_without_data(self):
+        stats = opl.investigator.check._compute_stats(self.data)
+        with self.assertRaises(AssertionError):
+            opl.investigator.check.check_by_iqr(None, 100, stats=stats)
+
+    def test_check_by_iqr_short_data(self):
+        result, info = opl.investigator.check.check_by_iqr([1.5, 2.5], 2)
+        self.assertTrue(result)
+        self.assertEqual(info["lower_boundary"], 1.25)
+        self.assertEqual(info["upper_boundary"], 2.75)
+        with self.assertRaises(statistics.StatisticsError):
+            opl.investigator.check.check(["check_by_iqr"], [100], 100)
+
+    def test_check_empty_data(self):
+        with self.assertRaises(statistics.StatisticsError):
+            opl.investigator.check.check(["check_by_min_max_0_1"], [], 100)
+
+    def test_check_short_data(self):
+        results, info = opl.investigator.check.check(
+            ["check_by_min_max_0_1"], [100], 100
+        )
+        self.assertEqual(results, [True])
+        with self.assertRaises(statistics.StatisticsError):
+            opl.investigator.check.check(["check_by_stdev_1"], [5], 5)
+
+    @unittest.skipIf(check_jit is None, "Numba is not installed")
+    def test_summarize_jit(self):
+        data = numpy.asarray(self.data, dtype=numpy.float64)
+        mean, stdev, data_min, data_max = check_jit.summarize(data)
+        self.assertAlmostEqual(mean, 100)
+        self.assertAlmostEqual(stdev, 3.807886552931954)
+        self.assertEqual(data_min, 95)
+        self.assertEqual(data_max, 105)
+        with self.assertRaises(ValueError):
+            check_jit.summarize(data[:1])
+
+    @unittest.skipIf(os.getenv("OPL_CHECK_JIT") == "1", "OPL_CHECK_JIT is set")
+    def test_jit_is_opt_in(self):
+        self.assertIsNone(opl.investigator.check.check_jit)
+
+    @unittest.mock.patch("opl.investigator.check.check_jit", None)
+    def test_summarize(self):
+        data = numpy.asarray(self.data, dtype=numpy.float64)
+        mean, stdev, data_min, data_max = opl.investigator.check._summarize(data)
+        self.assertAlmostEqual(mean, 100)
+        self.assertAlmostEqual(stdev, 3.807886552931954)
+        self.assertEqual(data_min, 95)
+        self.assertEqual(data_max, 105)
+        with self.assertRaises(ValueError):
+            opl.investigator.check._summarize(data[:1])
+
+    def test_check_unknown_method(self):
+        with self.assertRaises(AssertionError):
+            opl.investigator.check.check(["check"], self.data, 100)
+
+    def test_check_batch(self):
+        values = [90, 96, 100, 104, 110]
+        methods = ["check_by_min_max_0_1", "check_by_stdev_1", "check_by_iqr"]
+        results, info = opl.investigator.check.check_batch(methods, self.data, values)
+        self.assertEqual(results.shape, (3, 5))
+        for i, method in enumerate(methods):
+            self.assertEqual(info[i]["method"], method)
+            self.assertNotIn("value", info[i])
+            for j, value in enumerate(values):
+                expected, _ = opl.investigator.check.check([method], self.data, value)
+                self.assertEqual(results[i][j], expected[0])
+
+    def test_check_without_deviation(self):
+        results, info = opl.investigator.check.check(
+            ["check_by_min_max_0_1"], self.data, 110, compute_deviation=False
+        )
+        self.assertEqual(results, [False])
+        self.assertIsNone(info[0]["deviation"])
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+import argparse
+import datetime
+import threading
+import time
+import unittest
+
+import kafka.future
+
+from .context import opl
+
+
+def make_generator(count):
+    return ((str(i), {"id": i}) for i in range(count))
+
+
+def make_post_kafka_times(generator, produce_here=None, save_here=None, rate=0):
+    args = argparse.Namespace(
+        show_processed_messages=False,
+        rate=rate,
+        kafka_topic="some.topic",
+    )
+    config = {
+        "func_return_generator": lambda args: generator,
+        "func_return_message_payload": lambda args, mid, msg: str(msg["id"]),
+        "func_return_message_key": lambda args, mid, msg: mid,
+        "func_return_message_headers": lambda args, mid, msg: [],
+    }
+    return opl.post_kafka_times.PostKafkaTimes(args, config, produce_here, save_here)
+
+
+class FakeProducer:
+    """Acknowledges each message when next one is sent, fails every 3rd."""
+
+    def __init__(self):
+        self.sent = []
+        self.futures = []
+
+    def _acknowledge(self, i):
+        if self.futures[i].is_done:
+            return
+        if i % 3 == 0:
+            self.futures[i].failure(Exception("Failed to send"))
+        else:
+            self.futures[i].success(None)
+
+    def send(self, topic, value, key=None, headers=None):
+        if self.futures:
+            self._acknowledge(len(self.futures) - 1)
+        self.sent.append((topic, value, key, headers))
+        future = kafka.future.Future()
+        self.futures.append(future)
+        return future
+
+    def flush(self):
+        for i in range(len(self.futures)):
+            self._acknowledge(i)
+
+
+class FakeSaveHere:
+    def __init__(self):
+        self.rows = []
+
+    def add(self, row):
+        self.rows.append(row)
+
+
+class TestPrefetched(unittest.TestCase):
+    def test_order(self):
+        pkt = make_post_kafka_times(make_generator(100))
+        self.assertEqual(
+            [mid for mid, _ in pkt.prefetched(size=10)],
+            [str(i) for i in range(100)],
+        )
+
+    def test_exception(self):
+        def failing():
+            yield "0", {"id": 0}
+            raise KeyError("broken generator")
+
+        pkt = make_post_kafka_times(failing())
+        messages = pkt.prefetched()
+        self.assertEqual(next(messages)[0], "0")
+        with self.assertRaises(KeyError):
+            next(messages)
+
+    def test_close_early(self):
+        threads_before = set(threading.enumerate())
+        pkt = make_post_kafka_times(make_generator(1000))
+        messages = pkt.prefetched(size=2)
+        next(messages)
+        fill_threads = set(threading.enumerate()) - threads_before
+        self.assertEqual(len(fill_threads), 1)
+        messages.close()
+        for thread in fill_threads:
+            thread.join(timeout=5)
+            self.assertFalse(thread.is_alive())
+
+
+class TestWork(unittest.TestCase):
+    def test_store_sent(self):
+        produce_here = FakeProducer()
+        save_here = FakeSaveHere()
+        pkt = make_post_kafka_times(make_generator(10), produce_here, save_here)
+        before = time.time_ns()
+        with self.assertLogs(level="ERROR") as logs:
+            pkt.work()
+        after = time.time_ns()
+
+        self.assertEqual(len(produce_here.sent), 10)
+        self.assertEqual(produce_here.sent[0], ("some.topic", b"0", b"0", []))
+        # Messages which failed to be sent are logged and not stored
+        failed = [str(i) for i in range(10) if i % 3 == 0]
+        self.assertEqual(
+            [r.getMessage() for r in logs.records],
+            [f"Failed to produce message {i}" for i in failed],
+        )
+        self.assertEqual(
+            [mid for mid, _ in save_here.rows],
+            [str(i) for i in range(10) if str(i) not in failed],
+        )
+        for _, sent_at in save_here.rows:
+            self.assertTrue(before <= sent_at <= after)
+
+    def test_rate(self):
+        produce_here = FakeProducer()
+        pkt = make_post_kafka_times(
+            make_generator(50), produce_here, FakeSaveHere(), rate=20
+        )
+        before = time.perf_counter()
+        with self.assertLogs(level="ERROR"):
+            pkt.work()
+        duration = time.perf_counter() - before
+        self.assertEqual(len(produce_here.sent), 50)
+        # 20 messages in 1st second, 20 in 2nd second and 10 in 3rd second
+        self.assertGreaterEqual(duration, 2.0)
+        self.assertLess(duration, 2.5)
+
+
+class TestNsToDatetime(unittest.TestCase):
+    def test_ns_to_datetime(self):
+        mid, dt = opl.post_kafka_times.ns_to_datetime(
+            ("abc", 1_700_000_000_123_456_000)
+        )
+        self.assertEqual(mid, "abc")
+        self.assertEqual(
+            dt,
+            datetime.datetime(
+                2023, 11, 14, 22, 13, 20, 123456, tzinfo=datetime.timezone.utc
+            ),
+        )